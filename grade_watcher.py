@@ -2,21 +2,71 @@
 成绩监控核心类
 """
 
-import json
+import hashlib
 import os
 import random
 import re
 from typing import List, Optional
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 import time
 
 import requests
 from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 from urllib3.util.retry import Retry
 
-from models import Course, CourseManager
+from models import Course, CourseManager, json_dumps, json_loads
 from notifier import BaseNotifier
 
+# 默认请求头模板，模块加载时构建一次
+_DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.149 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+    "Accept-Language": "zh-CN,zh;q=0.9",
+    # 由 urllib3 决定：安装了 brotli 时包含 br（JSON 压缩率比 gzip 更高），否则为 gzip,deflate。
+    # 不能无条件声明 br，否则服务端返回 br 时本地无法解压。
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+    "Upgrade-Insecure-Requests": "1",
+    "Cache-Control": "max-age=0",
+    "TE": "Trailers",
+    "Pragma": "no-cache",
+    "Referer": "https://portal.pku.edu.cn/publicQuery/",
+}
+
+
+@lru_cache(maxsize=None)
+def _build_retry(max_retries: int, backoff_factor: float) -> Retry:
+    """构建连接池级别的重试策略（同一配置只构建一次）
+
+    - 对 429/502/503/504 等短暂服务异常自动重试
+    - 对 connect/read 阶段的短暂错误进行重试
+
+    Retry 对象不可变（每次重试都会生成新实例），可以安全地在多个 Session 间共享。
+    """
+    return Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=("HEAD", "GET", "POST", "PUT", "DELETE", "OPTIONS"),
+        backoff_factor=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+_SCORES_URL = "https://portal.pku.edu.cn/publicQuery/ctrl/topic/myScore/retrScores.do"
+
+# 成绩接口正常响应中必有的字段；会话失效时返回的是登录页等其他内容
+_SCORES_MARKER = b'"cjxx"'
+
+# 成绩查询重定向 URL 中携带的 JSESSIONID，例如 .../index.do;jsessionid=XXXX#/...
+_JSESSIONID_RE = re.compile(r"jsessionid=([^#;]+)")
+
 
 class GradeWatcher(requests.Session):
     """成绩监控器 - 负责数据获取和处理"""
@@ -26,7 +76,8 @@ class GradeWatcher(requests.Session):
                  request_timeout: tuple[float, float] = (5.0, 20.0),
                  debug_http: bool = False,
                  max_retries: int = 3,
-                 backoff_factor: float = 0.6):
+                 backoff_factor: float = 0.6,
+                 session_file: Optional[str] = None):
         super().__init__()
         self.username = username
         self.password = password
@@ -37,39 +88,22 @@ class GradeWatcher(requests.Session):
         self.debug_http = debug_http
         self.max_retries = int(max_retries)
         self.backoff_factor = float(backoff_factor)
+        # 登录后的 cookies 持久化到该文件，供下次运行复用会话；为空则不持久化
+        self.session_file = Path(session_file) if session_file else None
 
-        # 给 Session 配置连接池级别的重试：
-        # - 对 502/503/504 等短暂服务异常自动重试
-        # - 对 connect/read 阶段的短暂错误进行重试
+        # 给 Session 配置连接池级别的重试（策略见 _build_retry）
         # 说明：这解决的是“网络/服务瞬时抖动导致偶发失败”的场景。
-        retry = Retry(
-            total=self.max_retries,
-            connect=self.max_retries,
-            read=self.max_retries,
-            status=self.max_retries,
-            status_forcelist=(429, 502, 503, 504),
-            allowed_methods=("HEAD", "GET", "POST", "PUT", "DELETE", "OPTIONS"),
-            backoff_factor=self.backoff_factor,
-            respect_retry_after_header=True,
-            raise_on_status=False,
+        # HTTPAdapter 持有连接池，且会随 Session.close() 一起关闭，因此每个实例单独创建。
+        adapter = HTTPAdapter(
+            max_retries=_build_retry(self.max_retries, self.backoff_factor),
+            pool_connections=10,
+            pool_maxsize=10,
         )
-        adapter = HTTPAdapter(max_retries=retry, pool_connections=10, pool_maxsize=10)
         self.mount("https://", adapter)
         self.mount("http://", adapter)
         
         # 设置请求头
-        self.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/80.0.3987.149 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-            "Accept-Language": "zh-CN,zh;q=0.9",
-            "Accept-Encoding": "gzip, deflate",
-            "Connection": "keep-alive",
-            "Upgrade-Insecure-Requests": "1",
-            "Cache-Control": "max-age=0",
-            "TE": "Trailers",
-            "Pragma": "no-cache",
-            "Referer": "https://portal.pku.edu.cn/publicQuery/",
-        })
+        self.headers.update(_DEFAULT_HEADERS)
     
     def __del__(self):
         self.close()
@@ -142,7 +176,7 @@ class GradeWatcher(requests.Session):
             print(f"{'[登录]':<15}: 开始登录PKU门户...")
             
             # IAAA 登录
-            login_response = self.post(
+            login_response = json_loads(self.post(
                 "https://iaaa.pku.edu.cn/iaaa/oauthlogin.do",
                 data={
                     "userName": self.username,
@@ -153,7 +187,7 @@ class GradeWatcher(requests.Session):
                     "smsCode": "",
                     "optCode": "",
                 },
-            ).json()
+            ).content)
             
             if not login_response.get("success"):
                 raise ValueError(f"登录失败: {login_response}")
@@ -170,8 +204,11 @@ class GradeWatcher(requests.Session):
             )
             
             # 获取鉴权 JSESSION ID
-            jsessionid = re.search(r"jsessionid=([^#;]+)", redirect_response.url).group(1)
-            self.cookies.set("JSESSIONID", jsessionid)
+            match = _JSESSIONID_RE.search(redirect_response.url)
+            if not match:
+                raise ValueError(f"重定向地址中没有 jsessionid: {redirect_response.url}")
+            self.cookies.set("JSESSIONID", match.group(1))
+            self.save_session()
             
             print(f"{'[登录]':<15}: 登录成功")
             return True
@@ -180,24 +217,130 @@ class GradeWatcher(requests.Session):
             print(f"{'[登录]':<15}: 登录失败 - {e}")
             return False
     
-    def fetch_latest_grades(self) -> List[Course]:
+    def load_session(self) -> bool:
+        """从 session_file 恢复上次登录保存的 cookies
+
+        Returns:
+            bool: 是否成功恢复
+        """
+        if not self.session_file or not self.session_file.exists():
+            return False
+
+        try:
+            data = json_loads(self.session_file.read_bytes())
+            # 会话文件与创建它的账号绑定：换了账号（或旧格式文件）一律丢弃，重新登录
+            if not isinstance(data, dict) or data.get("user") != self._session_owner():
+                print(f"{'[登录]':<15}: 会话文件不属于当前账号，已删除，将重新登录")
+                self.session_file.unlink(missing_ok=True)
+                return False
+
+            for item in data.get("cookies", []):
+                self.cookies.set(
+                    item["name"],
+                    item["value"],
+                    domain=item.get("domain", ""),
+                    path=item.get("path", "/"),
+                    expires=item.get("expires"),
+                    secure=bool(item.get("secure", False)),
+                )
+            return True
+        except Exception as e:
+            print(f"{'[登录]':<15}: 读取会话文件失败，将重新登录 - {e}")
+            return False
+
+    def _session_owner(self) -> str:
+        """会话文件中记录的账号标识（学号的摘要，不落明文）"""
+        return hashlib.blake2b(str(self.username).encode("utf-8"), digest_size=16).hexdigest()
+
+    def save_session(self) -> bool:
+        """把当前 cookies 保存到 session_file（仅本用户可读写）
+
+        Returns:
+            bool: 是否保存成功
+        """
+        if not self.session_file:
+            return False
+
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure,
+            }
+            for cookie in self.cookies
+        ]
+        tmp_file = self.session_file.with_name(self.session_file.name + ".tmp")
+        try:
+            # cookies 等同于登录凭据，创建时即限制为 0600
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(json_dumps({"user": self._session_owner(), "cookies": cookies}))
+            os.replace(tmp_file, self.session_file)
+            return True
+        except Exception as e:
+            print(f"{'[登录]':<15}: 保存会话文件失败 - {e}")
+            return False
+
+    def has_session(self) -> bool:
+        """是否持有成绩查询所需的 JSESSIONID（不代表一定未过期）"""
+        # 门户可能在不同域下下发同名 cookie，cookies.get() 会因冲突抛异常，这里直接遍历
+        return any(cookie.name == "JSESSIONID" for cookie in self.cookies)
+
+    def try_fetch_with_session(self) -> Optional[bytes]:
+        """用已有会话直接请求成绩接口，省去登录的多次网络往返
+
+        Returns:
+            Optional[bytes]: 会话有效时返回成绩接口原始响应；没有会话或会话已失效时返回 None
+        """
+        if not self.has_session():
+            return None
+
+        try:
+            content = self.get(_SCORES_URL).content
+        except requests.exceptions.RequestException:
+            content = b""
+
+        if _SCORES_MARKER not in content:
+            print(f"{'[登录]':<15}: 已有会话已失效，需要重新登录")
+            return None
+
+        print(f"{'[登录]':<15}: 复用已有会话，跳过登录")
+        return content
+
+    def fetch_latest_grades(self, content: Optional[bytes] = None) -> Optional[List[Course]]:
         """
         步骤2: 获取最新的数据
         
+        Args:
+            content: 已获取的成绩接口原始响应（见 try_fetch_with_session）；为 None 时重新请求
+            
         Returns:
-            List[Course]: 最新的课程数据列表
+            Optional[List[Course]]: 最新的课程数据列表；
+                接口返回内容与上次保存时完全一致时返回 None（无需再解析和保存）
         """
         try:
             print(f"{'[获取数据]':<15}: 开始获取最新成绩数据...")
             
             # 获取成绩数据
-            response = self.get(
-                "https://portal.pku.edu.cn/publicQuery/ctrl/topic/myScore/retrScores.do",
-            ).json()
-            
-            # 保存原始数据（用于调试）
-            with open("current.json", "w", encoding="utf-8") as f:
-                json.dump(response, f, ensure_ascii=False, indent=4)
+            if content is None:
+                content = self.get(_SCORES_URL).content
+
+            # 保存原始响应（仅调试时）：直接写入原始字节，无需重新序列化
+            if self.debug_http:
+                with open("current.json", "wb") as f:
+                    f.write(content)
+
+            # 原始响应的摘要与上次保存时一致，说明成绩没有任何变化，
+            # 可以跳过 JSON 解析、逐门比对和重新写文件。
+            digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+            if digest == self.course_manager.source_digest:
+                print(f"{'[获取数据]':<15}: 成绩数据与上次完全一致，跳过解析")
+                return None
+
+            response = json_loads(content)
             
             # 解析课程数据
             courses = []
@@ -216,6 +359,9 @@ class GradeWatcher(requests.Session):
                     course = Course.from_raw_data(course_data, term_name)
                     courses.append(course)
             
+            # 摘要随课程数据一起保存，只有保存成功后才会在下次运行时生效
+            self.course_manager.source_digest = digest
+
             print(f"{'[获取数据]':<15}: 成功获取 {len(courses)} 门有效课程（总共 {total_courses} 条记录）")
             return courses
             
@@ -225,7 +371,7 @@ class GradeWatcher(requests.Session):
     
     def process_new_data(self, new_courses: List[Course]) -> tuple[List[Course], List[Course]]:
         """
-        步骤3: 逐条尝试向课程字典中加入新元素，如果成功，则触发通知流程
+        步骤3: 将新数据批量合并进课程字典，对新增/更新的课程触发通知流程
         
         Args:
             new_courses: 最新获取的课程列表
@@ -235,27 +381,18 @@ class GradeWatcher(requests.Session):
         """
         print(f"{'[处理数据]':<15}: 开始处理 {len(new_courses)} 门课程...")
         
-        new_courses_list = []
-        updated_courses_list = []
-        
+        # 新版接口可能不再返回 jd（绩点）；若为空且成绩为数值，则按公式补齐。
+        # 这样本地 course_data.json 与通知内容都能带上 gpa。
         for course in new_courses:
-            # 新版接口可能不再返回 jd（绩点）；若为空且成绩为数值，则按公式补齐。
-            # 这样本地 course_data.json 与通知内容都能带上 gpa。
             course.ensure_gpa()
 
-            # 尝试添加到字典中
-            should_notify, change_type = self.course_manager.add_course(course)
-            
-            if should_notify:
-                if change_type == 'new':
-                    new_courses_list.append(course)
-                    # 首次运行时不发送新课程通知，避免大量通知
-                    if not self.is_first_run:
-                        self._send_course_notification(course, is_new=True)
-                elif change_type == 'updated':
-                    updated_courses_list.append(course)
-                    # 成绩更新始终需要通知
-                    self._send_course_notification(course, is_new=False)
+        new_courses_list, updated_courses_list = self.course_manager.merge_courses(new_courses)
+
+        # 首次运行时不发送新课程通知，避免大量通知；成绩更新始终需要通知
+        self._send_batched_notification(
+            [] if self.is_first_run else new_courses_list,
+            updated_courses_list,
+        )
         
         total_changes = len(new_courses_list) + len(updated_courses_list)
         if self.is_first_run:
@@ -304,6 +441,41 @@ class GradeWatcher(requests.Session):
         except Exception as e:
             print(f"{'[通知]':<15}: 发送通知失败 - {e}")
     
+    def _send_batched_notification(self, new_courses: List[Course], updated_courses: List[Course]):
+        """把本次运行的所有变化合并成一条通知发送
+
+        只有一门课程变化时沿用单课程通知（带课程详情）；多门时合并为一条，
+        避免对每门课程各走一次网络发送。
+        """
+        if not self.notifier:
+            return
+
+        total = len(new_courses) + len(updated_courses)
+        if total == 0:
+            return
+        if total == 1:
+            if new_courses:
+                self._send_course_notification(new_courses[0], is_new=True)
+            else:
+                self._send_course_notification(updated_courses[0], is_new=False)
+            return
+
+        try:
+            def _line(course: Course) -> str:
+                return f"- {course.course_name}（{course.term}）：成绩 {course.grade}，绩点 {course.gpa}"
+
+            sections = []
+            if new_courses:
+                sections.append("发现新的课程成绩！\n" + "\n".join(_line(c) for c in new_courses))
+            if updated_courses:
+                sections.append("课程成绩有更新！\n" + "\n".join(_line(c) for c in updated_courses))
+
+            title = f"[成绩更新] {len(new_courses)}门新增/{len(updated_courses)}门更新"
+            self.notifier.send(title, "\n\n".join(sections))
+
+        except Exception as e:
+            print(f"{'[通知]':<15}: 发送通知失败 - {e}")
+    
     def run_full_workflow(self) -> bool:
         """运行完整的工作流程"""
         print(f"{'[开始]':<15}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -311,17 +483,27 @@ class GradeWatcher(requests.Session):
         
         try:
             # 步骤1: 初始化
+            # 初始化只读本地小文件，耗时可忽略；放在登录前顺序执行，日志不会与登录输出交错
             if not self.initialize():
                 print(f"{'[错误]':<15}: 初始化失败")
                 return False
-            
+
             # 登录
-            if not self.login():
+            # 已有有效会话（本进程内或上次运行保存到 session_file 的）时直接拿到成绩数据，不再登录
+            if not self.has_session():
+                self.load_session()
+            content = self.try_fetch_with_session()
+            if content is None and not self.login():
                 print(f"{'[错误]':<15}: 登录失败")
                 return False
             
             # 步骤2: 获取最新数据
-            new_courses = self.fetch_latest_grades()
+            new_courses = self.fetch_latest_grades(content)
+            if new_courses is None:
+                print("="*60)
+                print(f"{'[完成]':<15}: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"{'[统计]':<15}: 成绩无变化")
+                return True
             if not new_courses:
                 print(f"{'[错误]':<15}: 获取数据失败")
                 return False
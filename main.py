@@ -8,8 +8,14 @@ from pathlib import Path
 
 import yaml
 
+try:
+    # libyaml 绑定，比纯 Python 解析器快得多
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 from grade_watcher import GradeWatcher
-from notifier import create_notifier_from_config
+from notifier import configure_async_logging, create_notifier_from_config
 
 
 def load_config(config_file: str = "config.yaml") -> dict:
@@ -22,7 +28,7 @@ def load_config(config_file: str = "config.yaml") -> dict:
     
     try:
         with open(config_path, 'r', encoding='utf-8') as f:
-            config = yaml.load(f, Loader=yaml.FullLoader)
+            config = yaml.load(f, Loader=SafeLoader)
         return config
     except Exception as e:
         print(f"读取配置文件失败: {e}")
@@ -50,7 +56,8 @@ def main():
     if not validate_config(config):
         sys.exit(1)
     
-    # 创建通知器
+    # 创建通知器（通知日志经后台线程输出）
+    configure_async_logging()
     notifier = create_notifier_from_config(config)
     if notifier:
         print("成功创建通知器")
@@ -80,6 +87,7 @@ def main():
         debug_http=bool(config.get("debug_http", False)),
         max_retries=int(config.get("max_retries", 3)),
         backoff_factor=float(config.get("backoff_factor", 0.6)),
+        session_file=config.get("session_file", ".session_cookies.json"),
     )
     
     # 执行完整工作流程
@@ -92,6 +100,11 @@ def main():
     except Exception as e:
         print(f"{'[错误]':<15}: 程序执行出错 - {e}")
         sys.exit(1)
+    finally:
+        # 通知器接口只要求 send；持有连接/线程池的通知器才提供 close
+        close = getattr(notifier, "close", None)
+        if close is not None:
+            close()
 
 
 if __name__ == "__main__":
@@ -3,11 +3,51 @@
 """
 
 import json
-from typing import Dict, Set, List, Optional
+import os
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Set, List, Optional, Union
 import math
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, is_dataclass
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时回退到标准库 json
+    orjson = None
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """解析 JSON（优先使用 orjson，可直接接收 bytes）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_default(obj: Any) -> Any:
+    """标准库 json 的兜底序列化：dataclass 转为字典"""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return obj.to_dict() if hasattr(obj, "to_dict") else asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(obj: Any, indent: bool = True) -> bytes:
+    """序列化为 UTF-8 编码的 JSON 字节串（优先使用 orjson）
+
+    - orjson 只支持 2 空格缩进，这里统一使用 2 空格，保证两种实现输出一致。
+    - dataclass 实例可直接传入：orjson 原生支持，标准库通过 default 兜底。
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(
+        obj, ensure_ascii=False, indent=2 if indent else None, default=_json_default
+    ).encode("utf-8")
+
+
+# 除数字外，数值成绩可能的首字符（用于快速排除 "合格"/"通过" 等非数值成绩）。
+# n/N/i/I 对应 float() 也接受的 "nan"/"inf"，保留以免改变这类成绩的解析结果。
+_NUMERIC_LEAD_CHARS = frozenset("+-.nNiI")
+
 
 @dataclass
 class Course:
@@ -21,9 +61,14 @@ class Course:
     credit: str = ""  # 学分
     course_type: str = ""  # 课程类型
 
+    def __post_init__(self):
+        # course_id 与 term 构造后不再修改，唯一标识与哈希值只需计算一次
+        self._unique_key = f"{self.course_id}_{self.term}"
+        self._hash = hash((self.course_id, self.term))
+
     def __hash__(self):
         """使用课程ID和学期作为哈希值，支持重复修读"""
-        return hash((self.course_id, self.term))
+        return self._hash
 
     def __eq__(self, other):
         """判断两个课程是否相同，基于课程ID和学期"""
@@ -33,21 +78,26 @@ class Course:
 
     def get_unique_key(self) -> str:
         """获取课程的唯一标识，支持重复修读"""
-        return f"{self.course_id}_{self.term}"
+        return self._unique_key
 
     def has_grade_update(self, other: "Course") -> bool:
-        """检查是否有成绩更新"""
-        if not isinstance(other, Course):
-            return False
-        return (
-            self.course_id == other.course_id
-            and self.term == other.term
-            and (self.grade != other.grade or self.gpa != other.gpa)
-        )
+        """检查是否有成绩更新
+
+        调用方负责保证两者是同一门课程（唯一标识相同），这里只比较成绩与绩点。
+        """
+        return self.grade != other.grade or self.gpa != other.gpa
 
     def to_dict(self):
         """转换为字典格式"""
-        return asdict(self)
+        return {
+            "course_id": self.course_id,
+            "course_name": self.course_name,
+            "grade": self.grade,
+            "gpa": self.gpa,
+            "term": self.term,
+            "credit": self.credit,
+            "course_type": self.course_type,
+        }
 
     @staticmethod
     def _parse_numeric_grade(grade: str) -> Optional[float]:
@@ -59,7 +109,9 @@ class Course:
         if grade is None:
             return None
         s = str(grade).strip()
-        if not s:
+        # "合格"/"通过" 等非数值成绩很常见：先看首字符，避免走 float() 抛异常的慢路径
+        # 数字判断用 isdigit()：float() 同样接受全角等 Unicode 数字，如 "９２"
+        if not s or not (s[0].isdigit() or s[0] in _NUMERIC_LEAD_CHARS):
             return None
         try:
             return float(s)
@@ -72,33 +124,49 @@ class Course:
 
         GPA(x) = 4 - 3 * (100 - x)^2 / 1600
         """
-        return 4.0 - 3.0 * ((100.0 - float(x)) ** 2) / 1600.0
+        # 平方直接用乘法，避免 ** 的通用幂运算分派。
+        # 不把 3 / 1600 预先折成 0.001875：舍入误差会改变个别分数（如 62）的三位小数结果，
+        # 与已保存的 gpa 不一致时会被误判为成绩更新。
+        d = 100.0 - float(x)
+        return 4.0 - 3.0 * (d * d) / 1600.0
 
-    def ensure_gpa(self, precision: int = 3) -> bool:
-        """若 gpa 为空且成绩可解析为数值，则按公式补全 gpa。
-
-        Returns:
-            bool: 是否发生了写入/变更。
-        """
-        current = "" if self.gpa is None else str(self.gpa).strip()
-        if current:
-            return False
-
-        x = self._parse_numeric_grade(self.grade)
+    @classmethod
+    def _format_gpa(cls, grade: str, precision: int = 3) -> Optional[str]:
+        """把成绩换算为 gpa 字符串；成绩不是数值时返回 None"""
+        x = cls._parse_numeric_grade(grade)
         if x is None:
-            return False
+            return None
 
-        gpa_val = self.gpa_from_grade(x)
+        gpa_val = cls.gpa_from_grade(x)
 
         # 常见约束：GPA 通常落在 [0, 4]。公式在极端分数下可能小于 0。
         # 这里做一个温和的截断，避免出现负数。
         gpa_val = min(4.0, max(0.0, gpa_val))
 
         if not math.isfinite(gpa_val):
-            return False
+            return None
 
         # 存储为字符串，保持与现有 JSON 结构一致
-        self.gpa = f"{gpa_val:.{int(precision)}f}".rstrip("0").rstrip(".")
+        return f"{gpa_val:.{int(precision)}f}".rstrip("0").rstrip(".")
+
+    def has_gpa(self) -> bool:
+        """gpa 是否已有值"""
+        return self.gpa is not None and bool(str(self.gpa).strip())
+
+    def ensure_gpa(self, precision: int = 3) -> bool:
+        """若 gpa 为空且成绩可解析为数值，则按公式补全 gpa。
+
+        Returns:
+            bool: 是否发生了写入/变更。
+        """
+        if self.has_gpa():
+            return False
+
+        gpa = self._format_gpa(self.grade, precision)
+        if gpa is None:
+            return False
+
+        self.gpa = gpa
         return True
 
     @classmethod
@@ -137,6 +205,10 @@ class CourseManager:
         self.data_file = Path(data_file)
         # 使用字典存储课程，key为课程的唯一标识(course_id_term)，value为Course对象
         self.courses: Dict[str, Course] = {}
+        # 二级索引：course_id -> 该课程的所有修读记录（按学期升序），避免按 ID 查询时全表扫描
+        self._by_id: Dict[str, List[Course]] = defaultdict(list)
+        # 上次保存时成绩接口原始响应的摘要，用于判断数据是否有变化
+        self.source_digest: Optional[str] = None
 
     def initialize_from_file(self) -> bool:
         """从文件初始化课程数据"""
@@ -145,14 +217,13 @@ class CourseManager:
             return False
 
         try:
-            with open(self.data_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = json_loads(self.data_file.read_bytes())
 
             courses_data = data.get("courses", [])
             for course_data in courses_data:
-                course = Course.from_dict(course_data)
-                unique_key = course.get_unique_key()
-                self.courses[unique_key] = course
+                self._store(Course.from_dict(course_data))
+            # 课程全部加载成功后才采用摘要：否则下次抓取会因摘要相同被跳过，文件永远得不到修复
+            self.source_digest = data.get("source_digest")
 
             print(f"成功从文件加载 {len(self.courses)} 门课程")
             return True
@@ -176,66 +247,105 @@ class CourseManager:
 
         if existing_course is None:
             # 新课程
-            self.courses[unique_key] = course
+            self._store(course)
             return True, "new"
         else:
             # 检查是否有成绩更新
-            if course.has_grade_update(existing_course):
+            if (course.grade, course.gpa) != (existing_course.grade, existing_course.gpa):
                 # 有成绩更新
-                self.courses[unique_key] = course
+                self._store(course)
                 return True, "updated"
             else:
                 # 无变化
                 return False, "no_change"
 
+    def merge_courses(self, courses: List[Course]) -> tuple[List[Course], List[Course]]:
+        """
+        批量合并课程：先按唯一标识划分出新增/更新的课程，再只写入有变化的部分
+
+        Args:
+            courses: 最新获取的课程列表
+
+        Returns:
+            tuple[List[Course], List[Course]]: (新增课程列表, 更新课程列表)
+        """
+        incoming = {course.get_unique_key(): course for course in courses}
+        existing = self.courses
+
+        new_courses = [course for key, course in incoming.items() if key not in existing]
+        updated_courses = [
+            course
+            for key, course in incoming.items()
+            if key in existing
+            and (course.grade, course.gpa) != (existing[key].grade, existing[key].gpa)
+        ]
+
+        for course in new_courses:
+            self._store(course)
+        for course in updated_courses:
+            self._store(course)
+
+        return new_courses, updated_courses
+
     def get_course_by_key(self, course_id: str, term: str = None) -> Optional[Course]:
         """根据课程ID和学期获取课程"""
         if term:
             unique_key = f"{course_id}_{term}"
             return self.courses.get(unique_key)
         else:
-            # 如果没有指定学期，返回最新的课程记录
-            matching_courses = [
-                course
-                for key, course in self.courses.items()
-                if course.course_id == course_id
-            ]
-            if matching_courses:
-                # 按学期排序，返回最新的
-                return sorted(matching_courses, key=lambda x: x.term, reverse=True)[0]
-            return None
+            # 如果没有指定学期，返回最新的课程记录（索引内按学期升序，取末尾即可）
+            records = self._by_id.get(course_id)
+            return records[-1] if records else None
 
     def get_all_courses_for_id(self, course_id: str) -> List[Course]:
         """获取某个课程ID的所有修读记录（支持重复修读）"""
-        return [
-            course for course in self.courses.values() if course.course_id == course_id
-        ]
+        return list(self._by_id.get(course_id, ()))
+
+    def _store(self, course: Course):
+        """写入课程字典，并同步维护 course_id 索引"""
+        unique_key = course.get_unique_key()
+        existing_course = self.courses.get(unique_key)
+        self.courses[unique_key] = course
+
+        records = self._by_id[course.course_id]
+        if existing_course is not None:
+            # 同一 course_id + 学期的记录被替换，位置不变
+            records[records.index(existing_course)] = course
+        else:
+            terms = [c.term for c in records]
+            records.insert(bisect_right(terms, course.term), course)
 
     def save_to_file(self) -> bool:
-        """将当前课程字典保存到文件"""
-        try:
-            # 创建备份
-            if self.data_file.exists():
-                backup_file = self.data_file.with_suffix(".json.bak")
-                self.data_file.rename(backup_file)
+        """将当前课程字典保存到文件
 
+        采用原子写入：先写临时文件并 fsync，再用 os.replace 覆盖目标文件。
+        任何时刻目标文件要么是旧内容、要么是完整的新内容，不会出现缺失或半截文件。
+        """
+        tmp_file = self.data_file.with_name(self.data_file.name + ".tmp")
+        try:
+            # 直接传入 Course 实例，由 json_dumps 原生序列化 dataclass，省去逐个 to_dict
             data = {
-                "courses": [course.to_dict() for course in self.courses.values()],
+                "courses": list(self.courses.values()),
                 "total_count": len(self.courses),
+                "source_digest": self.source_digest,
             }
 
-            with open(self.data_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(tmp_file, "wb") as f:
+                f.write(json_dumps(data))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.data_file)
 
             print(f"成功保存 {len(self.courses)} 门课程到文件")
             return True
 
         except Exception as e:
             print(f"保存课程数据到文件时出错: {e}")
-            # 如果保存失败，尝试恢复备份
-            backup_file = self.data_file.with_suffix(".json.bak")
-            if backup_file.exists():
-                backup_file.rename(self.data_file)
+            # 原文件未被改动，只需清理残留的临时文件
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
             return False
 
     def get_all_courses(self) -> List[Course]:
@@ -248,9 +358,19 @@ class CourseManager:
         Returns:
             int: 被补齐/更新的课程数量。
         """
+        # 成绩的取值很少（大多是 60~100 的整数），同一成绩只换算一次，
+        # 避免对每门课程重复解析字符串、计算公式和格式化。
+        gpa_by_grade: Dict[str, Optional[str]] = {}
         updated = 0
         for course in self.courses.values():
-            if course.ensure_gpa(precision=precision):
+            if course.has_gpa():
+                continue
+            grade = course.grade
+            if grade not in gpa_by_grade:
+                gpa_by_grade[grade] = Course._format_gpa(grade, precision)
+            gpa = gpa_by_grade[grade]
+            if gpa is not None:
+                course.gpa = gpa
                 updated += 1
         return updated
 
@@ -265,3 +385,5 @@ class CourseManager:
     def clear(self):
         """清空所有课程数据"""
         self.courses.clear()
+        self._by_id.clear()
+        self.source_digest = None
@@ -2,21 +2,88 @@
 通知模块 - 支持 SMTP 邮件与控制台通知。
 """
 
+import atexit
+import html
+import logging
+import queue
 import smtplib
 import ssl
+import sys
+import textwrap
+import threading
+import time
 import requests
-from abc import ABC, abstractmethod
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict, Any
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from email import policy
+from email.headerregistry import Address
+from email.message import EmailMessage
+from email.utils import formataddr, getaddresses, parseaddr
+from typing import Optional, Dict, Any, List, Protocol, Tuple, Union
 
 from models import Course
 
+_log = logging.getLogger("notifier")
 
-class BaseNotifier(ABC):
-    """通知器基类"""
+# 未启用异步日志时直接同步写 stdout，保证 "发送成功/失败" 信息不会因为没有 handler 而丢失
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+_log.addHandler(_stdout_handler)
+_log.setLevel(logging.INFO)
+_log.propagate = False
+
+_log_queue: Optional[queue.Queue] = None
+_log_listener: Optional[QueueListener] = None
+
+
+def configure_async_logging(level: int = logging.INFO) -> None:
+    """让通知日志经由队列在后台线程写到 stdout
+
+    SMTP/Ntfy 请求进行中只做入队，不同步写终端/日志文件；每个通知器的 send 返回前会等待
+    队列写完（见 _flush_log），因此与主线程 print 的先后顺序仍然确定。
+    重复调用无副作用；进程退出时自动停止监听线程并恢复同步输出。
+    """
+    global _log_queue, _log_listener
+    if _log_listener is not None:
+        return
+
+    # 用带 task_done/join 的 Queue：_flush_log 需要等待已入队的记录全部写出
+    _log_queue = queue.Queue()
+    queue_handler = QueueHandler(_log_queue)
+    _log_listener = QueueListener(_log_queue, _stdout_handler)
+
+    _log.removeHandler(_stdout_handler)
+    _log.addHandler(queue_handler)
+    _log.setLevel(level)
+    _log_listener.start()
+
+    def _stop() -> None:
+        global _log_queue, _log_listener
+        # 先切回同步输出再停止监听线程：之后的日志不会进入无人消费的队列
+        _log.removeHandler(queue_handler)
+        _log.addHandler(_stdout_handler)
+        listener, _log_listener, _log_queue = _log_listener, None, None
+        if listener is not None:
+            listener.stop()
+
+    atexit.register(_stop)
+
+
+def _flush_log() -> None:
+    """等待已入队的通知日志全部写出（未启用异步日志时无操作）"""
+    log_queue = _log_queue
+    if log_queue is not None:
+        log_queue.join()
+
+
+class BaseNotifier(Protocol):
+    """通知器接口
+
+    按结构类型匹配：实现了 send 的对象即可作为通知器使用。
+    持有资源的通知器可另外提供 close()，调用方按需调用（没有则跳过）。
+    """
     
-    @abstractmethod
     def send(self, title: str, content: str, course: Optional[Course] = None) -> bool:
         """
         发送通知
@@ -29,7 +96,7 @@ class BaseNotifier(ABC):
         Returns:
             bool: 发送是否成功
         """
-        pass
+        ...
 
 
 class NtfyNotifier(BaseNotifier):
@@ -102,91 +169,19 @@ class NtfyNotifier(BaseNotifier):
             )
             response.raise_for_status()
 
-            print(f"Ntfy 通知发送成功: {title}")
+            _log.info("Ntfy 通知发送成功: %s", title)
+            _flush_log()
             return True
         except Exception as e:
-            print(f"Ntfy 通知发送失败: {e}")
+            _log.error("Ntfy 通知发送失败: %s", e)
+            _flush_log()
             return False
 
 
-class EmailNotifier(BaseNotifier):
-    """邮件通知器"""
-    
-    def __init__(
-        self,
-        smtp_server: str,
-        smtp_port: int,
-        username: str,
-        password: str,
-        from_email: str,
-        to_email: str,
-        security: str = "starttls",
-        timeout: int = 20,
-    ):
-        self.smtp_server = smtp_server
-        self.smtp_port = smtp_port
-        self.username = username
-        self.password = password
-        self.from_email = from_email
-        self.to_email = to_email
-        self.security = (security or "starttls").lower()
-        self.timeout = timeout
-    
-    def send(self, title: str, content: str, course: Optional[Course] = None) -> bool:
-        """发送邮件通知"""
-        try:
-            # 创建邮件
-            msg = MIMEMultipart()
-            msg['From'] = self.from_email
-            msg['To'] = self.to_email
-            msg['Subject'] = title
-            
-            # 构建邮件内容
-            email_content = self._build_email_content(content, course)
-            msg.attach(MIMEText(email_content, 'html', 'utf-8'))
-            
-            # 发送邮件
-            # security:
-            # - starttls: 先建立明文连接再升级 TLS（常见 587）
-            # - ssl: 直接 SSL/TLS（常见 465）
-            # - plain: 不加密（不推荐，仅用于内网/调试）
-            if self.security == "ssl":
-                context = ssl.create_default_context()
-                with smtplib.SMTP_SSL(
-                    self.smtp_server,
-                    self.smtp_port,
-                    timeout=self.timeout,
-                    context=context,
-                ) as server:
-                    server.login(self.username, self.password)
-                    server.send_message(msg)
-            else:
-                with smtplib.SMTP(
-                    self.smtp_server,
-                    self.smtp_port,
-                    timeout=self.timeout,
-                ) as server:
-                    server.ehlo()
-                    if self.security == "starttls":
-                        context = ssl.create_default_context()
-                        server.starttls(context=context)
-                        server.ehlo()
-                    server.login(self.username, self.password)
-                    server.send_message(msg)
-            
-            print(f"邮件通知发送成功: {title}")
-            return True
-            
-        except Exception as e:
-            print(f"邮件通知发送失败: {e}")
-            return False
-    
-    def _build_email_content(self, content: str, course: Optional[Course] = None) -> str:
-        """构建邮件HTML内容"""
-
-        # 邮件客户端对 CSS 支持差异很大，因此尽量使用“内联样式 + 结构简单”的方式。
-        # 这里做成卡片式布局，在移动端和桌面端都更易读。
-        html_template = """
+# 邮件客户端对 CSS 支持差异很大，因此尽量使用“内联样式 + 结构简单”的方式。
+# 这里做成卡片式布局，在移动端和桌面端都更易读。
+# 模板在模块加载时构建一次（去掉源码缩进带来的大量空白），发送时只做 str.format 填充。
+_HTML_TEMPLATE = textwrap.dedent("""
                 <!doctype html>
                 <html lang="zh-CN">
                 <head>
@@ -224,49 +219,263 @@ class EmailNotifier(BaseNotifier):
                     </div>
                 </body>
                 </html>
-                """
-
-        course_details = ""
-        if course:
-            # 课程详情：使用更适配邮件客户端的“伪表格”布局（仍保留 table 结构）。
-            def _safe(v: object) -> str:
-                return "" if v is None else str(v)
-
-            course_details = f"""
-                            <div style=\"padding:0 18px 16px 18px;\">
-                                <div style=\"margin-top:10px;padding-top:10px;border-top:1px solid #eef2f7;\"></div>
-                                <div style=\"display:flex;align-items:center;gap:10px;\">
-                                    <div style=\"width:10px;height:10px;border-radius:999px;background:#10b981;\"></div>
-                                    <div style=\"font-size:13px;color:#6b7280;\">课程详情</div>
+                """).strip()
+
+# 课程详情：使用更适配邮件客户端的“伪表格”布局（仍保留 table 结构）。
+_COURSE_TEMPLATE = textwrap.dedent("""
+                            <div style="padding:0 18px 16px 18px;">
+                                <div style="margin-top:10px;padding-top:10px;border-top:1px solid #eef2f7;"></div>
+                                <div style="display:flex;align-items:center;gap:10px;">
+                                    <div style="width:10px;height:10px;border-radius:999px;background:#10b981;"></div>
+                                    <div style="font-size:13px;color:#6b7280;">课程详情</div>
                                 </div>
-                                <div style=\"margin-top:10px;border:1px solid #e5e7eb;border-radius:12px;overflow:hidden;\">
-                                    <table role=\"presentation\" cellpadding=\"0\" cellspacing=\"0\" style=\"width:100%;border-collapse:separate;border-spacing:0;\">
-                                        <tr style=\"background:#f9fafb;\">
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#374151;width:34%;border-bottom:1px solid #e5e7eb;\"><strong>课程名称</strong></td>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#111827;border-bottom:1px solid #e5e7eb;\">{_safe(course.course_name)}</td>
-                                        </tr>
-                                        <tr>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#374151;background:#f9fafb;border-bottom:1px solid #e5e7eb;\"><strong>成绩</strong></td>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#111827;border-bottom:1px solid #e5e7eb;\">{_safe(course.grade)}</td>
-                                        </tr>
-                                        <tr style=\"background:#ffffff;\">
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#374151;background:#f9fafb;border-bottom:1px solid #e5e7eb;\"><strong>绩点</strong></td>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#111827;border-bottom:1px solid #e5e7eb;\">{_safe(course.gpa)}</td>
-                                        </tr>
-                                        <tr>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#374151;background:#f9fafb;border-bottom:1px solid #e5e7eb;\"><strong>学分</strong></td>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#111827;border-bottom:1px solid #e5e7eb;\">{_safe(course.credit)}</td>
-                                        </tr>
-                                        <tr>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#374151;background:#f9fafb;\"><strong>学期</strong></td>
-                                            <td style=\"padding:10px 12px;font-size:13px;color:#111827;\">{_safe(course.term)}</td>
-                                        </tr>
+                                <div style="margin-top:10px;border:1px solid #e5e7eb;border-radius:12px;overflow:hidden;">
+                                    <table role="presentation" cellpadding="0" cellspacing="0" style="width:100%;border-collapse:separate;border-spacing:0;">
+                                        {rows}
                                     </table>
                                 </div>
                             </div>
-                        """
-        
-        return html_template.format(content=content, course_details=course_details)
+                        """).strip()
+
+
+# 课程详情表格的行定义：(标签, Course 属性名)
+_COURSE_ROWS = (
+    ("课程名称", "course_name"),
+    ("成绩", "grade"),
+    ("绩点", "gpa"),
+    ("学分", "credit"),
+    ("学期", "term"),
+)
+
+_ROW_TEMPLATE = (
+    '<tr>'
+    '<td style="padding:10px 12px;font-size:13px;color:#374151;background:#f9fafb;width:34%;{border}"><strong>{label}</strong></td>'
+    '<td style="padding:10px 12px;font-size:13px;color:#111827;{border}">{value}</td>'
+    '</tr>'
+)
+
+_ROW_BORDER = "border-bottom:1px solid #e5e7eb;"
+
+
+@lru_cache(maxsize=256)
+def _render_course_fragment(*values: str) -> str:
+    """渲染课程详情 HTML 片段
+
+    values 按 _COURSE_ROWS 的顺序给出，逐个做 HTML 转义（课程名等来自教务系统，不可信）。
+    以字段值作为缓存键：同一课程经多个通知器、或在同一批通知中重复出现时只渲染一次；
+    成绩变化后字段不同，自然会重新渲染。
+    """
+    last = len(_COURSE_ROWS) - 1
+    rows = "".join(
+        _ROW_TEMPLATE.format(
+            label=label,
+            value=html.escape(value),
+            border="" if i == last else _ROW_BORDER,
+        )
+        for i, ((label, _), value) in enumerate(zip(_COURSE_ROWS, values))
+    )
+    return _COURSE_TEMPLATE.format(rows=rows)
+
+
+def _course_fields(course: Course) -> Tuple[str, ...]:
+    """按 _COURSE_ROWS 的顺序取出课程字段的字符串形式"""
+    return tuple(
+        "" if value is None else str(value)
+        for value in (getattr(course, attr) for _, attr in _COURSE_ROWS)
+    )
+
+
+@lru_cache(maxsize=16)
+def _render_email_html(content: str, course_fields: Tuple[str, ...]) -> str:
+    """渲染完整邮件 HTML；course_fields 为空表示不带课程详情"""
+    course_details = _render_course_fragment(*course_fields) if course_fields else ""
+    return _HTML_TEMPLATE.format(content=html.escape(content), course_details=course_details)
+
+
+def _build_email_content(content: str, course: Optional[Course] = None) -> str:
+    """构建邮件HTML内容
+
+    以 (正文, 课程字段) 为键缓存整页结果：多个邮件通知器或断线重发时不会重复渲染；
+    成绩、绩点等字段都在键内，成绩变化后必然重新渲染。
+    """
+    return _render_email_html(content, _course_fields(course) if course else ())
+
+
+def _make_address(display_name: str, addr_spec: str) -> Optional[Address]:
+    """用解析好的 (名字, 地址) 构造 Address，地址为空或不合法时返回 None"""
+    if not addr_spec:
+        return None
+    try:
+        return Address(display_name=display_name, addr_spec=addr_spec)
+    except Exception:
+        return None
+
+
+# SMTP 连接空闲超过该秒数后不再复用
+_SMTP_IDLE_TIMEOUT = 100
+
+# 不带课程详情且正文短于该长度的通知以纯文本发送
+_PLAIN_TEXT_LIMIT = 200
+
+
+class EmailNotifier(BaseNotifier):
+    """邮件通知器"""
+    
+    def __init__(
+        self,
+        smtp_server: str,
+        smtp_port: int,
+        username: str,
+        password: str,
+        from_email: str,
+        to_email: Union[str, List[str]],
+        security: str = "starttls",
+        timeout: int = 20,
+    ):
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.username = username
+        self.password = password
+        self.from_email = from_email
+        self.security = (security or "starttls").lower()
+        self.timeout = timeout
+        # 收件人可以是列表，或以逗号分隔的字符串；统一成 (名字, 地址) 列表，一次 SMTP 事务发给所有人。
+        # 用 getaddresses 而不是按逗号切分：显示名里可以带逗号（如 "Doe, John" <j@x.com>）
+        recipients = [
+            (name, addr)
+            for name, addr in getaddresses([to_email] if isinstance(to_email, str) else list(to_email))
+            if addr
+        ]
+        self.to_email: List[str] = [formataddr(pair) for pair in recipients]
+
+        # 地址头只解析一次：每次发送直接赋值 Address 对象，跳过地址语法解析
+        from_name, from_addr = parseaddr(self.from_email)
+        self._from_header = _make_address(from_name, from_addr) or self.from_email
+        to_addresses = [_make_address(name, addr) for name, addr in recipients]
+        self._to_header: Union[Tuple[Address, ...], str] = (
+            tuple(to_addresses) if all(to_addresses) else ", ".join(self.to_email)
+        )
+        # SMTP 信封地址（MAIL FROM / RCPT TO）只需要纯邮箱地址
+        self._envelope_from = from_addr or self.from_email
+        self._envelope_to = [addr for _, addr in recipients]
+        # SSLContext 可在多个连接间复用，只加载一次系统 CA 证书
+        self._ssl_context: Optional[ssl.SSLContext] = (
+            ssl.create_default_context() if self.security in ("ssl", "starttls") else None
+        )
+
+        # 复用的 SMTP 连接：避免每封邮件都重新走一遍 TCP + TLS + AUTH
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def __del__(self):
+        self.close()
+    
+    def send(self, title: str, content: str, course: Optional[Course] = None) -> bool:
+        """发送邮件通知"""
+        try:
+            # 创建邮件：没有附件，单个 text/html 部分即可，无需 multipart 包装
+            msg = EmailMessage(policy=policy.SMTP)
+            msg['From'] = self._from_header
+            msg['To'] = self._to_header
+            # 主题保持 str：EmailMessage 的新式 policy 只在序列化时按需做 RFC 2047 编码
+            msg['Subject'] = title
+            
+            # 构建邮件内容：无课程详情的简短通知直接发纯文本，省去整页 HTML
+            if course is None and len(content) < _PLAIN_TEXT_LIMIT:
+                msg.set_content(content, charset='utf-8')
+            else:
+                email_content = _build_email_content(content, course)
+                msg.set_content(email_content, subtype='html', charset='utf-8')
+            
+            # 只序列化一次，断线重试时直接复用同一份字节
+            data = msg.as_bytes(policy=policy.SMTP)
+
+            # 发送邮件
+            with self._lock:
+                try:
+                    self._get_connection().sendmail(self._envelope_from, self._envelope_to, data)
+                except smtplib.SMTPServerDisconnected:
+                    # 复用的连接已被服务器关闭：重新连接后重试一次
+                    self._drop_connection()
+                    self._get_connection().sendmail(self._envelope_from, self._envelope_to, data)
+                self._last_used = time.monotonic()
+            
+            _log.info("邮件通知发送成功: %s", title)
+            _flush_log()
+            return True
+            
+        except Exception as e:
+            # 出错后连接状态未知，不再复用
+            with self._lock:
+                self._drop_connection()
+            _log.error("邮件通知发送失败: %s", e)
+            _flush_log()
+            return False
+
+    def close(self):
+        """关闭复用的 SMTP 连接"""
+        lock = getattr(self, "_lock", None)
+        if lock is None:
+            return
+        with lock:
+            self._drop_connection(graceful=True)
+
+    def _connect(self) -> smtplib.SMTP:
+        """建立新的 SMTP 连接并完成登录"""
+        # security:
+        # - starttls: 先建立明文连接再升级 TLS（常见 587）
+        # - ssl: 直接 SSL/TLS（常见 465）
+        # - plain: 不加密（不推荐，仅用于内网/调试）
+        if self.security == "ssl":
+            server = smtplib.SMTP_SSL(
+                self.smtp_server,
+                self.smtp_port,
+                timeout=self.timeout,
+                context=self._ssl_context,
+            )
+        else:
+            server = smtplib.SMTP(
+                self.smtp_server,
+                self.smtp_port,
+                timeout=self.timeout,
+            )
+
+        try:
+            # starttls() 与 login() 会在需要时自动补发 EHLO，无需显式调用
+            if self.security == "starttls":
+                server.starttls(context=self._ssl_context)
+            server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _get_connection(self) -> smtplib.SMTP:
+        """获取可复用的 SMTP 连接，不存在或空闲过久时重新建立（调用方需持有锁）"""
+        if self._smtp is not None and time.monotonic() - self._last_used > _SMTP_IDLE_TIMEOUT:
+            # 服务器通常会断开长时间空闲的连接，与其发送时失败再重试，不如直接重连
+            self._drop_connection(graceful=True)
+        if self._smtp is None:
+            self._smtp = self._connect()
+            self._last_used = time.monotonic()
+        return self._smtp
+
+    def _drop_connection(self, graceful: bool = False):
+        """丢弃当前连接（调用方需持有锁）"""
+        server, self._smtp = self._smtp, None
+        if server is None:
+            return
+        try:
+            if graceful:
+                server.quit()
+            else:
+                server.close()
+        except Exception:
+            server.close()
+
+
+_BANNER = "=" * 50
 
 
 class ConsoleNotifier(BaseNotifier):
@@ -274,12 +483,15 @@ class ConsoleNotifier(BaseNotifier):
     
     def send(self, title: str, content: str, course: Optional[Course] = None) -> bool:
         """在控制台输出通知"""
-        print(f"\n{'='*50}")
-        print(f"通知标题: {title}")
-        print(f"通知内容: {content}")
-        if course:
-            print(f"课程信息: {course.course_name} - {course.grade}")
-        print(f"{'='*50}\n")
+        # 拼成一整块一次写出：MultiNotifier 并发发送时不会和其他输出交错
+        course_line = f"课程信息: {course.course_name} - {course.grade}\n" if course else ""
+        sys.stdout.write(
+            f"\n{_BANNER}\n"
+            f"通知标题: {title}\n"
+            f"通知内容: {content}\n"
+            f"{course_line}"
+            f"{_BANNER}\n\n"
+        )
         return True
 
 
@@ -288,25 +500,77 @@ class MultiNotifier(BaseNotifier):
     
     def __init__(self):
         self.notifiers = []
+        # 首次发送时按需创建，用于并发调用各通知器
+        self._pool: Optional[ThreadPoolExecutor] = None
     
     def add_notifier(self, notifier: BaseNotifier):
         """添加通知器"""
         self.notifiers.append(notifier)
     
     def send(self, title: str, content: str, course: Optional[Course] = None) -> bool:
-        """发送通知到所有注册的通知器"""
-        success_count = 0
-        
-        for notifier in self.notifiers:
-            try:
-                if notifier.send(title, content, course):
-                    success_count += 1
-            except Exception as e:
-                print(f"通知器 {type(notifier).__name__} 发送失败: {e}")
+        """并发发送到所有注册的通知器，耗时取决于最慢的一个而不是所有通知器之和"""
+        if len(self.notifiers) <= 1:
+            # 只有一个通知器时直接调用，无需线程池
+            results = [self._safe_send(notifier, title, content, course) for notifier in self.notifiers]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=len(self.notifiers), thread_name_prefix="notifier"
+                )
+            futures = [
+                self._pool.submit(self._safe_send, notifier, title, content, course)
+                for notifier in self.notifiers
+            ]
+            results = [future.result() for future in as_completed(futures)]
+
+        success_count = sum(1 for ok in results if ok)
+        # 各通知器的日志写完再返回，保证与调用方后续输出的先后顺序
+        _flush_log()
         
         # 只要有一个成功就认为成功
         return success_count > 0
 
+    @staticmethod
+    def _safe_send(notifier: BaseNotifier, title: str, content: str, course: Optional[Course]) -> bool:
+        """调用单个通知器，异常视为发送失败"""
+        try:
+            return bool(notifier.send(title, content, course))
+        except Exception as e:
+            _log.error("通知器 %s 发送失败: %s", type(notifier).__name__, e)
+            return False
+
+    def close(self):
+        """关闭线程池以及所有注册的通知器"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        for notifier in self.notifiers:
+            close = getattr(notifier, "close", None)
+            if close is not None:
+                close()
+
+
+# 启用邮件通知所必需的配置项
+_EMAIL_REQUIRED = frozenset({
+    'smtp_server', 'smtp_port', 'email_username', 'email_password', 'from_email', 'to_email',
+})
+
+
+def _email_from_config(config: Dict[str, Any]) -> Optional[EmailNotifier]:
+    """根据配置创建邮件通知器，缺少必需配置项时返回 None"""
+    if not _EMAIL_REQUIRED <= config.keys():
+        return None
+    return EmailNotifier(
+        smtp_server=config['smtp_server'],
+        smtp_port=config['smtp_port'],
+        username=config['email_username'],
+        password=config['email_password'],
+        from_email=config['from_email'],
+        to_email=config['to_email'],
+        security=config.get('smtp_security', 'starttls'),
+        timeout=int(config.get('smtp_timeout', 20)),
+    )
+
 
 def create_notifier_from_config(config: Dict[str, Any]) -> Optional[BaseNotifier]:
     """根据配置创建通知器"""
@@ -329,18 +593,8 @@ def create_notifier_from_config(config: Dict[str, Any]) -> Optional[BaseNotifier
     if notifier_type == 'ntfy':
         return _build_ntfy_notifier()
 
-    if notifier_type == 'email' and all(k in config for k in
-        ['smtp_server', 'smtp_port', 'email_username', 'email_password', 'from_email', 'to_email']):
-        return EmailNotifier(
-            smtp_server=config['smtp_server'],
-            smtp_port=config['smtp_port'],
-            username=config['email_username'],
-            password=config['email_password'],
-            from_email=config['from_email'],
-            to_email=config['to_email'],
-            security=config.get('smtp_security', 'starttls'),
-            timeout=int(config.get('smtp_timeout', 20)),
-        )
+    if notifier_type == 'email':
+        return _email_from_config(config)
     
     elif notifier_type == 'console':
         return ConsoleNotifier()
@@ -350,7 +604,7 @@ def create_notifier_from_config(config: Dict[str, Any]) -> Optional[BaseNotifier
 
         enable_email = config.get("enable_email")
         if enable_email is None:
-            enable_email = all(k in config for k in ['smtp_server', 'smtp_port', 'email_username', 'email_password', 'from_email', 'to_email'])
+            enable_email = _EMAIL_REQUIRED <= config.keys()
 
         enable_ntfy = bool(config.get("enable_ntfy"))
 
@@ -360,18 +614,10 @@ def create_notifier_from_config(config: Dict[str, Any]) -> Optional[BaseNotifier
                 multi_notifier.add_notifier(ntfy_notifier)
 
         # 添加邮件通知
-        if enable_email and all(k in config for k in ['smtp_server', 'smtp_port', 'email_username', 
-                                   'email_password', 'from_email', 'to_email']):
-            multi_notifier.add_notifier(EmailNotifier(
-                smtp_server=config['smtp_server'],
-                smtp_port=config['smtp_port'],
-                username=config['email_username'],
-                password=config['email_password'],
-                from_email=config['from_email'],
-                to_email=config['to_email'],
-                security=config.get('smtp_security', 'starttls'),
-                timeout=int(config.get('smtp_timeout', 20)),
-            ))
+        if enable_email:
+            email_notifier = _email_from_config(config)
+            if email_notifier:
+                multi_notifier.add_notifier(email_notifier)
 
         # 可选：同时输出到控制台
         if config.get('console'):